@@ -1,68 +1,109 @@
 from fastapi import FastAPI,HTTPException,Depends,Query
+from fastapi.responses import ORJSONResponse
 from src.db_prep.db import get_async_session,Table
 from sqlalchemy.ext.asyncio import AsyncSession 
 from typing import List
-from sqlalchemy import func,select,or_,and_
+from functools import lru_cache
+from sqlalchemy import select,or_,and_,bindparam
+
+MAX_PRODUCTS=500
+FILTER_BATCH_SIZE=64
+
 app=FastAPI(
     title="Assessment",
     description="api to get competitive search",
     version='0.1.0',
     docs='/docs',
-    redoc_url='/redocs'
+    redoc_url='/redocs',
+    default_response_class=ORJSONResponse
 )
 
-def filter_products(products,price):
+def escape_like(keyword):
+    return keyword.replace("\\","\\\\").replace("%","\\%").replace("_","\\_")
+
+@lru_cache(maxsize=32)
+def search_statement(keyword_count):
+    search_conditons=[
+        Table.description_product.ilike(bindparam(f"keyword_{i}"),escape="\\")
+        for i in range(keyword_count)
+    ]
+    return select(
+        Table.id,
+        Table.description_product,
+        Table.price,
+        Table.rating,
+        Table.reviews
+    ).where(and_(*search_conditons)).limit(MAX_PRODUCTS)
+
+def evaluate_products(products,price):
+    candidates = []
     passed = []
     rejected = []
+    min_price = 0.75*price
+    max_price = 2*price
     
     for p in products:
+        product = {
+            "id": str(p.id),
+            "description_product": p.description_product,
+            "price": p.price,
+            "rating": p.rating,
+            "reviews": p.reviews,
+        }
+        candidates.append(product)
+
         if p.rating is not None and p.rating < 3.5:
             rejected.append({
-                "id": str(p.id),
+                "id": product["id"],
                 # "reason": f"Rejected: rating {p.rating} < 3.5"
             })
             continue
 
         if p.reviews is not None and p.reviews < 100:
             rejected.append({
-                "id": str(p.id),
+                "id": product["id"],
                 # "reason": f"Rejected: reviews {p.review} < 100"
             })
             continue
         
-        if p.price<0.75*price or p.price>2*price:
+        if p.price<min_price or p.price>max_price:
             rejected.append({
-                "id":p.id,
-                "description_product":p.description_product,
-                "price":p.price,
+                "id":product["id"],
+                "description_product":product["description_product"],
+                "price":product["price"],
                 # "reason":"Price not in range"
             })
             continue
-        passed.append(p)
+        passed.append(product)
 
-    return passed, rejected
+    return candidates, passed, rejected
     
 
 @app.get('/related-products')
 async def get_related_products(keywords:str= Query(..., description="Keywords to search for in products"),
                                price:float=Query(...,description="Price of the product"),
                                session:AsyncSession=Depends(get_async_session)):
-    if not keywords:
+    keyword_list = sorted(
+        {k.strip().lower() for k in keywords.split(',') if k.strip()},
+        key=lambda k:(-len(k),k)
+    )
+    if not keyword_list:
         raise HTTPException(status_code=400,detail="Atleast one keyword should be provided")
-    search_conditons=[]
-    keyword_list = [k.strip() for k in keywords.split(',')]
-    for keyword in keyword_list:
-        keyword_pattern=f"%{keyword}%"
-        search_conditons.append(
-            func.lower(Table.description_product).like(func.lower(keyword_pattern))
-        )
-        
-    query=select(Table).where(and_(*search_conditons))
-    result=await session.execute(query)
+    keyword_patterns={
+        f"keyword_{i}":f"%{escape_like(keyword)}%"
+        for i,keyword in enumerate(keyword_list)
+    }
+    result=await session.stream(search_statement(len(keyword_list)),keyword_patterns)
     
-    products=result.scalars().all()
-    passed,rejected=filter_products(products,price)
-    return {
+    products=[]
+    passed=[]
+    rejected=[]
+    async for batch in result.partitions(FILTER_BATCH_SIZE):
+        batch_products,batch_passed,batch_rejected=evaluate_products(batch,price)
+        products.extend(batch_products)
+        passed.extend(batch_passed)
+        rejected.extend(batch_rejected)
+    return ORJSONResponse({
         "step":"product_search",
         "input":{
             "keywords":keywords
@@ -74,7 +115,7 @@ async def get_related_products(keywords:str= Query(..., description="Keywords to
             "rejected":rejected
         }
         
-    }
+    })
     
 
 
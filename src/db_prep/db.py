@@ -1,6 +1,6 @@
 import uuid
 from collections.abc import AsyncGenerator
-from sqlalchemy import Column,String,Text,Integer,Float
+from sqlalchemy import Column,String,Text,Integer,Float,Index,DDL,event
 from sqlalchemy.orm import DeclarativeBase,Mapped,mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.asyncio import AsyncSession ,create_async_engine,async_sessionmaker
@@ -12,12 +12,25 @@ class Base(DeclarativeBase):
 
 class Table(Base):
     __tablename__ = "product_reviews"  
+    __table_args__ = (
+        Index(
+            "ix_product_reviews_description_trgm",
+            "description_product",
+            postgresql_using="gin",
+            postgresql_ops={"description_product": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True),primary_key=True,default=uuid.uuid4)
     description_product: Mapped[str] = mapped_column(Text, nullable=False)
     price: Mapped[float] = mapped_column(Float, nullable=False)
     rating: Mapped[float | None] = mapped_column(Float)
     reviews: Mapped[int | None] = mapped_column(Integer)
 
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 
 engine=create_async_engine(DATABASE_URL)
 async_session_maker=async_sessionmaker(engine,expire_on_commit=False)